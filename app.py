@@ -8,6 +8,7 @@ import os
 from werkzeug.utils import secure_filename
 import threading
 import time
+import atexit
 import sys
 import yaml
 sys.path.append('.')
@@ -65,6 +66,7 @@ MT5_ACCOUNT, MT5_PASSWORD, MT5_SERVER = _load_broker_config()
 # Initialize collectors
 news_collector = NewsCollector(DB_PATH)
 trade_history_manager = TradeHistoryManager(DB_PATH)
+atexit.register(trade_history_manager.close)  # lepas handle DB/WAL saat exit
 news_updater_thread = start_news_updater(interval_minutes=30)
 print("✓ News updater started via Forex Factory (updates every 30 minutes)")
 
@@ -752,7 +754,7 @@ def api_news_high_impact_today():
 def api_news_update():
     """Manually trigger news update from Forex Factory"""
     try:
-        count = news_collector.update_news()
+        count = news_collector.update_news(force=True)
         return jsonify({
             'success': True,
             'message': f'Updated {count} news items from Forex Factory',
@@ -22,6 +22,9 @@ from datetime import datetime, timedelta
 FF_THIS_WEEK = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
 FF_NEXT_WEEK = "https://nfs.faireconomy.media/ff_calendar_nextweek.json"
 
+# Fetch ulang ke Forex Factory paling cepat tiap N detik (lihat update_news)
+NEWS_FETCH_TTL = 600
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 }
@@ -36,6 +39,16 @@ IMPACT_MAP = {
 }
 
 
+def group_news_by_impact(news):
+    """Bucket news ke {'High': [...], 'Medium': [...], 'Low': [...]} dalam satu pass"""
+    groups = {'High': [], 'Medium': [], 'Low': []}
+    for item in news:
+        bucket = groups.get(item['impact'])
+        if bucket is not None:
+            bucket.append(item)
+    return groups
+
+
 # ======================================================================
 # NewsCollector CLASS
 # ======================================================================
@@ -73,11 +86,22 @@ class NewsCollector:
                 )
             ''')
 
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_time       ON news(event_time)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_currency   ON news(currency)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_impact     ON news(impact)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_event_id   ON news(event_id)')
 
+            # Key/value kecil, mis. watermark fetch terakhir
+            cursor.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+            # Index gabungan untuk query upcoming/recent (range event_time + filter impact),
+            # menggantikan idx_news_time (prefix yang sama, cuma menambah biaya write);
+            # ANALYZE sekali saat index baru dibuat supaya planner memakainya
+            cursor.execute('DROP INDEX IF EXISTS idx_news_time')
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_news_time_impact'")
+            if cursor.fetchone() is None:
+                cursor.execute('CREATE INDEX idx_news_time_impact ON news(event_time, impact, currency)')
+                cursor.execute('ANALYZE news')
+
             conn.commit()
             conn.close()
             logging.info("News table initialized successfully")
@@ -85,43 +109,59 @@ class NewsCollector:
         except Exception as e:
             logging.error(f"Error initializing news table: {str(e)}")
 
+    def has_table(self, name):
+        """Cek apakah table `name` ada di database"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+            ).fetchone()
+            conn.close()
+            return row is not None
+        except Exception as e:
+            logging.error(f"Error checking table {name}: {str(e)}")
+            return False
+
     def save_news_to_db(self, news_items):
         """Simpan list news ke DB, skip duplikat berdasarkan event_id"""
         if not news_items:
             return 0
 
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            saved = 0
+        # Siapkan semua row dulu, lalu satu executemany dalam satu transaksi
+        now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = []
+        for item in news_items:
+            try:
+                rows.append((
+                    now_str,
+                    item['event_id'],
+                    item['title'],
+                    item['country'],
+                    item['currency'],
+                    item['impact'],
+                    item.get('forecast', ''),
+                    item.get('previous', ''),
+                    item.get('actual', ''),
+                    item['event_time'].strftime('%Y-%m-%d %H:%M:%S'),
+                    'ForexFactory'
+                ))
+            except Exception as e:
+                logging.error(f"Error saving news item: {str(e)}")
+                continue
 
-            for item in news_items:
-                try:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO news
-                        (timestamp, event_id, title, country, currency, impact,
-                         forecast, previous, actual, event_time, source)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        item['event_id'],
-                        item['title'],
-                        item['country'],
-                        item['currency'],
-                        item['impact'],
-                        item.get('forecast', ''),
-                        item.get('previous', ''),
-                        item.get('actual', ''),
-                        item['event_time'].strftime('%Y-%m-%d %H:%M:%S'),
-                        'ForexFactory'
-                    ))
-                    if cursor.rowcount > 0:
-                        saved += 1
-                except Exception as e:
-                    logging.error(f"Error saving news item: {str(e)}")
-                    continue
+        if not rows:
+            return 0
 
-            conn.commit()
+        try:
+            conn = sqlite3.connect(self.db_path)
+            with conn:
+                cursor = conn.executemany('''
+                    INSERT OR REPLACE INTO news
+                    (timestamp, event_id, title, country, currency, impact,
+                     forecast, previous, actual, event_time, source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                saved = cursor.rowcount
             conn.close()
             return saved
 
@@ -213,12 +253,45 @@ class NewsCollector:
     # UPDATE (dipanggil dari luar)
     # ------------------------------------------------------------------
 
-    def update_news(self, days_ahead=7):
+    def _get_meta(self, key):
+        """Baca value dari table meta (None kalau belum ada)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            conn.close()
+            return row[0] if row else None
+        except Exception as e:
+            logging.error(f"Error reading meta {key}: {str(e)}")
+            return None
+
+    def _set_meta(self, values):
+        """Simpan dict {key: value} ke table meta dalam satu transaksi"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [(k, str(v)) for k, v in values.items()]
+                )
+            conn.close()
+        except Exception as e:
+            logging.error(f"Error writing meta: {str(e)}")
+
+    def update_news(self, days_ahead=7, force=False):
         """
         Fetch news dari Forex Factory dan simpan ke DB.
         Selalu ambil minggu ini + minggu depan.
         Kompatibel dengan pemanggilan di main.py dan app.py.
+
+        Kalau fetch terakhir < NEWS_FETCH_TTL detik yang lalu (dan tidak force),
+        tidak fetch ulang dan return 0 (tidak ada item yang disimpan call ini).
         """
+        if not force:
+            last_fetch = self._get_meta('last_news_fetch')
+            if last_fetch and time.time() - float(last_fetch) < NEWS_FETCH_TTL:
+                logging.info("News masih fresh, skip fetch Forex Factory")
+                return 0
+
         all_news = []
 
         # Ambil minggu ini
@@ -236,6 +309,8 @@ class NewsCollector:
             return 0
 
         saved = self.save_news_to_db(all_news)
+        if saved > 0:  # DB error -> tanpa watermark, dicoba lagi di call berikutnya
+            self._set_meta({'last_news_fetch': time.time()})
         logging.info(f"Forex Factory: {len(all_news)} events fetched, {saved} baru disimpan")
         return saved
 
@@ -304,6 +379,23 @@ class NewsCollector:
             where += f" AND impact = '{impact}'"
         return self._query_news(where)
 
+    def get_upcoming_impact_counts(self, hours=48):
+        """Jumlah news yang akan datang per impact (dihitung di SQL)"""
+        counts = {'High': 0, 'Medium': 0, 'Low': 0}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.execute(f'''
+                SELECT impact, COUNT(*)
+                FROM news
+                WHERE event_time >= datetime('now') AND event_time <= datetime('now', '+{int(hours)} hours')
+                GROUP BY impact
+            ''')
+            counts.update(cursor.fetchall())
+            conn.close()
+        except Exception as e:
+            logging.error(f"Error counting news: {str(e)}")
+        return counts
+
     def get_high_impact_news_today(self):
         """High impact news hari ini"""
         return self._query_news(
@@ -1,8 +1,23 @@
 import MetaTrader5 as mt5
+import numpy as np
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, TimeoutError as FutureTimeout
 from datetime import datetime
+from math import fabs
 from typing import Optional, Dict
 
+from src.utils import pip_multiplier
+
+# MT5's Python package has no OrderSendAsync binding, so SLTP/close orders
+# are dispatched on a small thread pool. Single orders block until the
+# broker answers; batches are joined with a deadline and any order still
+# in flight is finished by a done-callback.
+ORDER_WORKERS       = 8
+ORDER_BATCH_TIMEOUT = 5.0   # seconds to wait for a fanned-out batch
+
+ACCOUNT_TTL = 0.25  # seconds an account_info() snapshot is reused
+
 
 class TradeExecutor:
     """
@@ -42,6 +57,19 @@ class TradeExecutor:
         # Tick data cache for CARS sentiment (updated from main.py)
         self._tick_data_cache: Dict = {}
 
+        # Static symbol properties (point, digits, ...) keyed by symbol
+        self._sym_cache: Dict[str, object] = {}
+
+        # Best price seen per ticket; trailing SL only moves when it improves
+        self._tsl_watermark: Dict[int, float] = {}
+
+        # (monotonic time, AccountInfo) — see _account()
+        self._account_cache: Optional[tuple] = None
+
+        # Worker pool for non-blocking SLTP / close orders
+        self._order_pool = ThreadPoolExecutor(max_workers=ORDER_WORKERS,
+                                              thread_name_prefix="order")
+
     # ------------------------------------------------------------------
 
     def refresh_from_strategy(self):
@@ -106,6 +134,20 @@ class TradeExecutor:
             self.max_orders_total    = 6
             self.max_orders_per_side = 6
 
+        # Strategy-constant lookups used on every signal
+        self._risk_mid   = (self.risk_per_trade_min + self.risk_per_trade_max) / 2
+        self._risk_table = (
+            (80, self.risk_per_trade_max),
+            (65, self._risk_mid),
+            (0,  self.risk_per_trade_min),
+        )
+        self._am = (
+            self.strategy_manager.strategy_config
+                .get('unique_features', {})
+                .get('anti_martingale_progression', {})
+            if self.strategy_manager else {}
+        )
+
     # ------------------------------------------------------------------
     # EXECUTE SIGNAL
     # ------------------------------------------------------------------
@@ -116,9 +158,12 @@ class TradeExecutor:
             if action not in ('BUY', 'SELL'):
                 return False
 
+            # ── Snapshot: one positions / account fetch for all gates ──
+            all_pos      = mt5.positions_get() or ()
+            account_info = self._account()
+
             # ── Gate 1: max open positions (LME uses max_orders_total) ──
-            total_positions = mt5.positions_get()
-            total_count     = len(total_positions) if total_positions else 0
+            total_count     = len(all_pos)
             effective_max   = self.max_orders_total  # LME: total across all pairs
 
             if total_count >= effective_max:
@@ -128,7 +173,6 @@ class TradeExecutor:
                 return False
 
             # ── Gate 1b: max orders per side ──────────────────────────
-            all_pos       = total_positions or []
             order_type_id = 0 if action == 'BUY' else 1
             same_side     = [p for p in all_pos if p.type == order_type_id]
             if len(same_side) >= self.max_orders_per_side:
@@ -139,16 +183,16 @@ class TradeExecutor:
                 return False
 
             # ── Gate 1c: Max 1 position per pair per direction ─────────
-            existing = mt5.positions_get(symbol=symbol)
-            if existing:
-                for pos in existing:
-                    existing_type = 'BUY' if pos.type == 0 else 'SELL'
-                    if existing_type == action:
-                        logging.info(
-                            f"[PairGate] {symbol} already has {existing_type} position "
-                            f"(ticket={pos.ticket}), skipping same direction"
-                        )
-                        return False
+            for pos in all_pos:
+                if pos.symbol != symbol:
+                    continue
+                existing_type = 'BUY' if pos.type == 0 else 'SELL'
+                if existing_type == action:
+                    logging.info(
+                        f"[PairGate] {symbol} already has {existing_type} position "
+                        f"(ticket={pos.ticket}), skipping same direction"
+                    )
+                    return False
 
             # ── Gate 2: daily loss limit ───────────────────────────────
             if self.max_daily_loss > 0 and self.daily_pnl <= -self.max_daily_loss:
@@ -156,7 +200,6 @@ class TradeExecutor:
                 return False
 
             # ── Gate 3: drawdown limit ─────────────────────────────────
-            account_info = mt5.account_info()
             if account_info:
                 equity  = account_info.equity
                 balance = account_info.balance
@@ -167,7 +210,7 @@ class TradeExecutor:
                         return False
 
             # ── Gate 4: Portfolio heat cap ─────────────────────────────
-            if not self._check_portfolio_heat(account_info):
+            if not self._check_portfolio_heat(account_info, all_pos):
                 return False
 
             # ── Symbol availability ────────────────────────────────────
@@ -180,13 +223,18 @@ class TradeExecutor:
                     logging.error(f"Cannot select symbol {symbol}")
                     return False
 
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                logging.error(f"No tick for {symbol}")
+                return False
+
             if action == 'BUY':
                 order_type = mt5.ORDER_TYPE_BUY
-                price      = mt5.symbol_info_tick(symbol).ask
+                price      = tick.ask
                 magic      = self.buy_magic
             else:
                 order_type = mt5.ORDER_TYPE_SELL
-                price      = mt5.symbol_info_tick(symbol).bid
+                price      = tick.bid
                 magic      = self.sell_magic
 
             sl = signal.get('stop_loss')
@@ -199,9 +247,10 @@ class TradeExecutor:
             sl = round(sl, digits)
             tp = round(tp, digits)
 
-            lot = self.calculate_position_size(symbol, price, sl, signal)
+            lot = self.calculate_position_size(symbol, price, sl, signal,
+                                               account_info, sym_info)
 
-            filling_mode = self._get_filling_mode(symbol)
+            filling_mode = self._get_filling_mode(symbol, sym_info)
 
             request = {
                 "action":       mt5.TRADE_ACTION_DEAL,
@@ -226,7 +275,8 @@ class TradeExecutor:
                 logging.error(f"Order rejected: {result.retcode} — {result.comment}")
                 return False
 
-            rr = self._rr(price, sl, tp)
+            risk = fabs(price - sl)
+            rr   = fabs(tp - price) / risk if risk > 0 else 0.0
             logging.info("=" * 60)
             logging.info("[OK] ORDER EXECUTED")
             logging.info(f"Symbol     : {symbol}")
@@ -250,7 +300,7 @@ class TradeExecutor:
             import traceback; logging.error(traceback.format_exc())
             return False
 
-    def _check_portfolio_heat(self, account_info) -> bool:
+    def _check_portfolio_heat(self, account_info, positions=None) -> bool:
         """Check total risk of all open positions does not exceed portfolio heat cap."""
         if not account_info or not self.strategy_manager:
             return True
@@ -259,7 +309,8 @@ class TradeExecutor:
         if heat_cap <= 0:
             return True
 
-        positions = mt5.positions_get()
+        if positions is None:
+            positions = mt5.positions_get()
         if not positions:
             return True
 
@@ -268,10 +319,13 @@ class TradeExecutor:
             return True
 
         total_risk = 0.0
+        infos = {}  # one symbol_info per symbol (tick value is price-dependent)
         for pos in positions:
             if pos.sl > 0:
                 sl_dist   = abs(pos.price_open - pos.sl)
-                sym_info  = mt5.symbol_info(pos.symbol)
+                sym_info  = infos.get(pos.symbol)
+                if sym_info is None:
+                    sym_info = infos[pos.symbol] = mt5.symbol_info(pos.symbol)
                 if sym_info:
                     tick_val  = sym_info.trade_tick_value
                     tick_size = sym_info.trade_tick_size
@@ -290,9 +344,11 @@ class TradeExecutor:
     # ------------------------------------------------------------------
 
     def calculate_position_size(self, symbol: str, entry_price: float,
-                                 stop_loss: float, signal: dict) -> float:
+                                 stop_loss: float, signal: dict,
+                                 account=None, sym_info=None) -> float:
         try:
-            sym_info = mt5.symbol_info(symbol)
+            if sym_info is None:
+                sym_info = mt5.symbol_info(symbol)
             if sym_info is None:
                 return 0.01
 
@@ -306,7 +362,8 @@ class TradeExecutor:
                 return lot
 
             # ── RISK-BASED SIZING ──────────────────────────────────────
-            account = mt5.account_info()
+            if account is None:
+                account = self._account()
             if account is None:
                 return self._min_lot(symbol)
 
@@ -314,30 +371,24 @@ class TradeExecutor:
             base_capital = account.equity if self.compounding else account.balance
 
             confidence = signal.get('confidence', 0)
-            if confidence >= 80:
-                risk_pct = self.risk_per_trade_max
-            elif confidence >= 65:
-                risk_pct = (self.risk_per_trade_min + self.risk_per_trade_max) / 2
-            else:
-                risk_pct = self.risk_per_trade_min
+            risk_pct   = next((r for thr, r in self._risk_table if confidence >= thr),
+                              self.risk_per_trade_min)
 
             # Anti-martingale
-            if self.strategy_manager:
-                uf = self.strategy_manager.strategy_config.get('unique_features', {})
-                am = uf.get('anti_martingale_progression', {})
-                if am:
-                    trigger  = am.get('consecutive_wins_trigger', 3)
-                    increase = am.get('position_size_increase',   0.5)
-                    max_mult = am.get('max_position_size_multiplier', 4.0)
-                    recovery = am.get('recovery_extra_risk_after_loss', 0.0)
-                    if self.consecutive_wins >= trigger:
-                        mult     = 1 + increase * (self.consecutive_wins - trigger + 1)
-                        mult     = min(mult, max_mult)
-                        risk_pct *= mult
-                        logging.info(f"Anti-martingale x{mult:.2f}")
-                    if self.consecutive_losses > 0 and recovery > 0:
-                        risk_pct += recovery
-                        logging.info(f"Recovery mode +{recovery*100:.2f}%")
+            am = self._am
+            if am:
+                trigger  = am.get('consecutive_wins_trigger', 3)
+                increase = am.get('position_size_increase',   0.5)
+                max_mult = am.get('max_position_size_multiplier', 4.0)
+                recovery = am.get('recovery_extra_risk_after_loss', 0.0)
+                if self.consecutive_wins >= trigger:
+                    mult     = 1 + increase * (self.consecutive_wins - trigger + 1)
+                    mult     = min(mult, max_mult)
+                    risk_pct *= mult
+                    logging.info(f"Anti-martingale x{mult:.2f}")
+                if self.consecutive_losses > 0 and recovery > 0:
+                    risk_pct += recovery
+                    logging.info(f"Recovery mode +{recovery*100:.2f}%")
 
             # ACA pair-specific risk allocation
             if self.strategy_manager and self.strategy_manager._norm.get('aca_enabled', False):
@@ -375,10 +426,22 @@ class TradeExecutor:
             logging.error(f"Error calculating position size: {e}")
             return self._min_lot(symbol)
 
-    def _get_filling_mode(self, symbol: str):
+    def _account(self, ttl: float = ACCOUNT_TTL):
+        """mt5.account_info(), reused for `ttl` seconds across one signal."""
+        now = time.monotonic()
+        cached = self._account_cache
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1]
+        account = mt5.account_info()
+        if account is not None:
+            self._account_cache = (now, account)
+        return account
+
+    def _get_filling_mode(self, symbol: str, info=None):
         """Auto-detect filling mode supported by broker for this symbol."""
         try:
-            info = mt5.symbol_info(symbol)
+            if info is None:
+                info = mt5.symbol_info(symbol)
             if info is None:
                 return mt5.ORDER_FILLING_FOK
             filling = info.filling_mode  # bitmask: 1=FOK, 2=IOC, 4=Return
@@ -409,83 +472,182 @@ class TradeExecutor:
             if not positions:
                 return
 
-            total_profit = 0.0
-            for pos in positions:
-                profit = pos.profit
-                total_profit += profit
-                if 'JPY' in pos.symbol:
-                    pips = (pos.price_current - pos.price_open) * 100 if pos.type == 0 \
-                           else (pos.price_open - pos.price_current) * 100
-                else:
-                    pips = (pos.price_current - pos.price_open) * 10000 if pos.type == 0 \
-                           else (pos.price_open - pos.price_current) * 10000
-                status = "[+]" if profit >= 0 else "[-]"
-                logging.info(
-                    f"{status} {pos.ticket}: {pos.symbol} "
-                    f"{'BUY' if pos.type == 0 else 'SELL'} "
-                    f"vol={pos.volume} pips={pips:+.1f} profit=${profit:.2f}"
-                )
-                self.update_trailing_stop(pos)
+            # One column per field (SoA) so pips/P&L are single vector ops
+            n        = len(positions)
+            opens    = np.fromiter((p.price_open    for p in positions), np.float64, n)
+            currents = np.fromiter((p.price_current for p in positions), np.float64, n)
+            sls      = np.fromiter((p.sl            for p in positions), np.float64, n)
+            profits  = np.fromiter((p.profit        for p in positions), np.float64, n)
+            types    = np.fromiter((p.type          for p in positions), np.int8,    n)
+            mult     = np.fromiter((pip_multiplier(p.symbol) for p in positions), np.float64, n)
+
+            is_buy = types == 0
+            sign   = np.where(is_buy, 1.0, -1.0)
+            pips   = sign * (currents - opens) * mult
+            total_profit = float(profits.sum())
+
+            # One log record per tick; skip all formatting when INFO is off
+            if logging.root.isEnabledFor(logging.INFO):
+                lines = [f"Open: {n} | Total P&L: ${total_profit:.2f}"]
+                for pos, pip, profit in zip(positions, pips.tolist(), profits.tolist()):
+                    status = "[+]" if profit >= 0 else "[-]"
+                    lines.append(
+                        f"  {status} {pos.ticket}: {pos.symbol} "
+                        f"{'BUY' if pos.type == 0 else 'SELL'} "
+                        f"vol={pos.volume} pips={pip:+.1f} profit=${profit:.2f}"
+                    )
+                logging.info("\n".join(lines))
+
+            # A trailing SL always sits behind price, so it can only improve
+            # on positions whose price is already beyond the current SL.
+            pending = []
+            if self.trading_config.get('trailing_stop_enabled', False):
+                can_trail = np.where(is_buy, currents > sls, (currents < sls) | (sls == 0))
+                for i in np.flatnonzero(can_trail).tolist():
+                    self.update_trailing_stop(positions[i], pending)
+
+            # Join all trailing-stop modifications sent above
+            if pending:
+                wait([f for _, _, f in pending], timeout=ORDER_BATCH_TIMEOUT)
+                for pos, new_sl, future in pending:
+                    self._modify_done(pos, new_sl, future, timeout=0)
+
+            # Drop watermarks of tickets closed broker-side (SL/TP hit)
+            if len(self._tsl_watermark) > n:
+                live = {p.ticket for p in positions}
+                self._tsl_watermark = {t: w for t, w in self._tsl_watermark.items() if t in live}
 
             self.daily_pnl = total_profit
-            logging.info(f"Open: {len(positions)} | Total P&L: ${total_profit:.2f}")
 
         except Exception as e:
             logging.error(f"Error managing positions: {e}")
 
-    def update_trailing_stop(self, position):
+    def update_trailing_stop(self, position, pending: Optional[list] = None):
+        """
+        Trail the SL behind price. When `pending` is given the SLTP order is
+        only dispatched and (position, new_sl, future) is appended for the
+        caller to join; otherwise the modification completes before returning.
+        """
         try:
             if not self.trading_config.get('trailing_stop_enabled', False):
                 return
+            # Nothing to do unless price made a new favourable extreme
+            ticket = position.ticket
+            price  = position.price_current
+            if position.type == mt5.ORDER_TYPE_BUY:
+                if price <= self._tsl_watermark.get(ticket, float('-inf')):
+                    return
+            elif price >= self._tsl_watermark.get(ticket, float('inf')):
+                return
+            self._tsl_watermark[ticket] = price
+
             tsl_pips = self.trading_config.get('trailing_stop_pips', 15)
-            sym_info = mt5.symbol_info(position.symbol)
-            point    = sym_info.point
+            point    = self._symbol_info(position.symbol).point
+            new_sl   = None
             if position.type == mt5.ORDER_TYPE_BUY:
-                new_sl = position.price_current - tsl_pips * point * 10
-                if new_sl > position.sl:
-                    self.modify_position(position, new_sl, position.tp)
+                sl = position.price_current - tsl_pips * point * 10
+                if sl > position.sl:
+                    new_sl = sl
             elif position.type == mt5.ORDER_TYPE_SELL:
-                new_sl = position.price_current + tsl_pips * point * 10
-                if new_sl < position.sl or position.sl == 0:
-                    self.modify_position(position, new_sl, position.tp)
+                sl = position.price_current + tsl_pips * point * 10
+                if sl < position.sl or position.sl == 0:
+                    new_sl = sl
+            if new_sl is None:
+                return
+            if pending is None:
+                self.modify_position(position, new_sl, position.tp)
+            else:
+                pending.append((position, new_sl,
+                                self._modify_async(position, new_sl, position.tp)))
         except Exception as e:
             logging.error(f"Error updating trailing stop: {e}")
 
-    def modify_position(self, position, new_sl: float, new_tp: float) -> bool:
+    def _symbol_info(self, symbol: str):
+        """symbol_info cached per symbol — only use for static fields."""
+        info = self._sym_cache.get(symbol)
+        if info is None:
+            info = mt5.symbol_info(symbol)
+            if info is not None:
+                self._sym_cache[symbol] = info
+        return info
+
+    def _send_async(self, request: dict):
+        """Dispatch mt5.order_send without blocking; returns a Future."""
+        return self._order_pool.submit(mt5.order_send, request)
+
+    def _modify_async(self, position, new_sl: float, new_tp: float):
+        return self._send_async({
+            "action":   mt5.TRADE_ACTION_SLTP,
+            "position": position.ticket,
+            "sl":       new_sl,
+            "tp":       new_tp,
+        })
+
+    def _modify_done(self, position, new_sl: float, future, timeout=None) -> bool:
         try:
-            result = mt5.order_send({
-                "action":   mt5.TRADE_ACTION_SLTP,
-                "position": position.ticket,
-                "sl":       new_sl,
-                "tp":       new_tp,
-            })
-            if result.retcode == mt5.TRADE_RETCODE_DONE:
-                logging.info(f"Modified {position.ticket}: SL={new_sl:.5f}")
-                return True
-            logging.warning(f"Modify failed: {result.comment}")
+            result = future.result(timeout=timeout)
+        except FutureTimeout:
+            # Still queued and may yet be accepted: keep the watermark so no
+            # second SLTP goes out, and settle it once the order completes.
+            logging.warning(f"Modify {position.ticket} still pending")
+            future.add_done_callback(lambda f: self._modify_done(position, new_sl, f))
             return False
         except Exception as e:
             logging.error(f"Error modifying position: {e}")
-            return False
+            result = None
+        try:
+            if result is not None:
+                if result.retcode == mt5.TRADE_RETCODE_DONE:
+                    logging.info(f"Modified {position.ticket}: SL={new_sl:.5f}")
+                    return True
+                logging.warning(f"Modify failed: {result.comment}")
+        except Exception as e:
+            logging.error(f"Error modifying position: {e}")
+        # Forget the watermark so the next tick retries at the same price
+        self._tsl_watermark.pop(position.ticket, None)
+        return False
 
-    def close_position(self, position) -> bool:
+    def modify_position(self, position, new_sl: float, new_tp: float) -> bool:
+        try:
+            future = self._modify_async(position, new_sl, new_tp)
+        except Exception as e:
+            logging.error(f"Error modifying position: {e}")
+            self._tsl_watermark.pop(position.ticket, None)
+            return False
+        return self._modify_done(position, new_sl, future)
+
+    def _close_async(self, position, tick=None):
+        if tick is None:
+            tick = mt5.symbol_info_tick(position.symbol)
+        price = tick.bid if position.type == 0 else tick.ask
+        return self._send_async({
+            "action":       mt5.TRADE_ACTION_DEAL,
+            "position":     position.ticket,
+            "symbol":       position.symbol,
+            "volume":       position.volume,
+            "type":         mt5.ORDER_TYPE_SELL if position.type == 0 else mt5.ORDER_TYPE_BUY,
+            "price":        price,
+            "deviation":    self.slippage,
+            "magic":        self.magic_number,
+            "comment":      "Close",
+            "type_time":    mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        })
+
+    def _close_done(self, position, future, timeout=None) -> bool:
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeout:
+            # The close can still fill — do the bookkeeping when it does
+            logging.warning(f"Close {position.ticket} still pending")
+            future.add_done_callback(lambda f: self._close_done(position, f))
+            return False
+        except Exception as e:
+            logging.error(f"Error closing position: {e}")
+            return False
         try:
-            tick  = mt5.symbol_info_tick(position.symbol)
-            price = tick.bid if position.type == 0 else tick.ask
-            result = mt5.order_send({
-                "action":       mt5.TRADE_ACTION_DEAL,
-                "position":     position.ticket,
-                "symbol":       position.symbol,
-                "volume":       position.volume,
-                "type":         mt5.ORDER_TYPE_SELL if position.type == 0 else mt5.ORDER_TYPE_BUY,
-                "price":        price,
-                "deviation":    self.slippage,
-                "magic":        self.magic_number,
-                "comment":      "Close",
-                "type_time":    mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            })
             if result.retcode == mt5.TRADE_RETCODE_DONE:
+                self._tsl_watermark.pop(position.ticket, None)
                 if position.profit > 0:
                     self.consecutive_wins  += 1
                     self.consecutive_losses = 0
@@ -505,13 +667,30 @@ class TradeExecutor:
             logging.error(f"Error closing position: {e}")
             return False
 
+    def close_position(self, position) -> bool:
+        try:
+            future = self._close_async(position)
+        except Exception as e:
+            logging.error(f"Error closing position: {e}")
+            return False
+        return self._close_done(position, future)
+
     def close_all_positions(self):
         positions = mt5.positions_get()
-        if positions:
-            for p in positions:
-                self.close_position(p)
-
-    def _rr(self, entry, sl, tp) -> float:
-        risk   = abs(entry - sl)
-        reward = abs(tp - entry)
-        return reward / risk if risk > 0 else 0
\ No newline at end of file
+        if not positions:
+            return
+
+        # One tick per symbol, not per position
+        ticks = {sym: mt5.symbol_info_tick(sym) for sym in {p.symbol for p in positions}}
+
+        # Fan out every close, then join once — total latency ~1 broker RTT
+        pending = []
+        for p in positions:
+            try:
+                pending.append((p, self._close_async(p, ticks[p.symbol])))
+            except Exception as e:
+                logging.error(f"Error closing position: {e}")
+
+        wait([f for _, f in pending], timeout=ORDER_BATCH_TIMEOUT)
+        for p, future in pending:
+            self._close_done(p, future, timeout=0)
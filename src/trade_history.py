@@ -1,21 +1,46 @@
 import MetaTrader5 as mt5
+import csv
 import sqlite3
 import logging
+import threading
 from datetime import datetime, timedelta
 
+# MT5 history is fetched in windows of this many days so each RPC stays
+# small and completed trades are written before the next window loads
+SYNC_CHUNK_DAYS = 7
+
 class TradeHistoryManager:
     """Manage trade history in database"""
     
     def __init__(self, db_path="data/database/trading_data.db"):
         self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
         self.init_trade_history_table()
     
+    def _connection(self):
+        """Long-lived connection shared across calls (use under self._lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        return self._conn
+    
+    def close(self):
+        """Close the shared connection (reopened lazily on next use)"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
     def init_trade_history_table(self):
         """Initialize trade_history table"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # WAL is persistent on the DB file: readers no longer block the sync writer
+            cursor.execute('PRAGMA journal_mode=WAL')
+            
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS trade_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -58,81 +83,47 @@ class TradeHistoryManager:
             from_date = datetime.now() - timedelta(days=days)
             to_date = datetime.now()
             
-            # Get all deals from MT5
-            deals = mt5.history_deals_get(from_date, to_date)
-            
-            if deals is None or len(deals) == 0:
-                logging.info("No deals found in MT5 history")
-                return 0
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            # Latest entry/exit deal per position ticket, kept across windows so a
+            # position closed in parts ends up with its last exit (O(positions), not O(deals))
+            entries = {}
+            exits = {}
+            deals_count = 0
             
-            # Group deals by position ticket to get complete trades
-            position_deals = {}
-            
-            for deal in deals:
-                position_id = deal.position_id
-                
-                if position_id not in position_deals:
-                    position_deals[position_id] = []
-                
-                position_deals[position_id].append(deal)
-            
-            saved_count = 0
-            
-            for position_id, deal_list in position_deals.items():
-                # Sort deals by time
-                deal_list.sort(key=lambda x: x.time)
+            chunk_start = from_date
+            while chunk_start < to_date:
+                chunk_end = min(chunk_start + timedelta(days=SYNC_CHUNK_DAYS), to_date)
+                deals = mt5.history_deals_get(chunk_start, chunk_end)
+                chunk_start = chunk_end
                 
-                # Find entry and exit deals
-                entry_deal = None
-                exit_deal = None
+                if not deals:
+                    continue
+                deals_count += len(deals)
                 
-                for deal in deal_list:
+                # MT5 returns deals in time order, so the last IN/OUT seen wins
+                for deal in deals:
                     if deal.entry == 0:  # DEAL_ENTRY_IN
-                        entry_deal = deal
+                        entries[deal.position_id] = deal
                     elif deal.entry == 1:  # DEAL_ENTRY_OUT
-                        exit_deal = deal
-                
-                # Only save complete trades (with both entry and exit)
-                if entry_deal and exit_deal:
-                    try:
-                        open_time = datetime.fromtimestamp(entry_deal.time)
-                        close_time = datetime.fromtimestamp(exit_deal.time)
-                        duration = int((close_time - open_time).total_seconds())
-                        
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO trade_history
-                            (ticket, order_ticket, symbol, type, volume, open_price, close_price,
-                             open_time, close_time, profit, commission, swap, magic, comment, duration_seconds)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            exit_deal.ticket,
-                            exit_deal.order,
-                            exit_deal.symbol,
-                            'BUY' if exit_deal.type == 0 else 'SELL',
-                            exit_deal.volume,
-                            entry_deal.price,
-                            exit_deal.price,
-                            open_time.strftime('%Y-%m-%d %H:%M:%S'),
-                            close_time.strftime('%Y-%m-%d %H:%M:%S'),
-                            exit_deal.profit,
-                            exit_deal.commission,
-                            exit_deal.swap,
-                            exit_deal.magic,
-                            exit_deal.comment,
-                            duration
-                        ))
-                        
-                        saved_count += 1
-                        
-                    except Exception as e:
-                        logging.error(f"Error saving trade {exit_deal.ticket}: {str(e)}")
-                        continue
+                        exits[deal.position_id] = deal
             
-            conn.commit()
-            conn.close()
+            if deals_count == 0:
+                logging.info("No deals found in MT5 history")
+                return 0
+            
+            # Only save complete trades (with both entry and exit)
+            rows = []
+            for position_id, exit_deal in exits.items():
+                entry_deal = entries.get(position_id)
+                if entry_deal is None:
+                    continue
+                try:
+                    rows.append(self._trade_row(entry_deal, exit_deal))
+                except Exception as e:
+                    logging.error(f"Error saving trade {exit_deal.ticket}: {str(e)}")
+            
+            if rows:
+                self._save_trades(rows)
+            saved_count = len(rows)
             
             logging.info(f"Synced {saved_count} trades from MT5 to database")
             return saved_count
@@ -141,11 +132,47 @@ class TradeHistoryManager:
             logging.error(f"Error syncing trades from MT5: {str(e)}")
             return 0
     
+    def _trade_row(self, entry_deal, exit_deal):
+        """Build the trade_history row tuple for one closed position"""
+        # Stored as 'YYYY-MM-DD HH:MM:SS' text (app.py filters with date(close_time));
+        # isoformat is cheaper than strftime and duration needs no datetime at all
+        open_time = datetime.fromtimestamp(entry_deal.time).isoformat(' ', 'seconds')
+        close_time = datetime.fromtimestamp(exit_deal.time).isoformat(' ', 'seconds')
+        duration = int(exit_deal.time - entry_deal.time)
+        
+        return (
+            exit_deal.ticket,
+            exit_deal.order,
+            exit_deal.symbol,
+            'BUY' if exit_deal.type == 0 else 'SELL',
+            exit_deal.volume,
+            entry_deal.price,
+            exit_deal.price,
+            open_time,
+            close_time,
+            exit_deal.profit,
+            exit_deal.commission,
+            exit_deal.swap,
+            exit_deal.magic,
+            exit_deal.comment,
+            duration
+        )
+    
+    def _save_trades(self, rows):
+        """Write trade rows in one transaction with executemany (one prepare, one fsync)"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO trade_history
+                    (ticket, order_ticket, symbol, type, volume, open_price, close_price,
+                     open_time, close_time, profit, commission, swap, magic, comment, duration_seconds)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+    
     def get_trade_history(self, days=None, symbol=None, limit=None):
         """Get trade history from database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
             query = '''
                 SELECT ticket, order_ticket, symbol, type, volume, open_price, close_price,
                        open_time, close_time, profit, commission, swap, magic, comment, duration_seconds
@@ -156,7 +183,8 @@ class TradeHistoryManager:
             params = []
             
             if days:
-                query += " AND close_time >= datetime('now', '-{} days')".format(days)
+                query += " AND close_time >= datetime('now', '-' || ? || ' days')"
+                params.append(int(days))
             
             if symbol:
                 query += " AND symbol = ?"
@@ -168,30 +196,12 @@ class TradeHistoryManager:
                 query += " LIMIT ?"
                 params.append(limit)
             
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            trades = []
-            for row in cursor.fetchall():
-                trades.append({
-                    'ticket': row[0],
-                    'order_ticket': row[1],
-                    'symbol': row[2],
-                    'type': row[3],
-                    'volume': row[4],
-                    'open_price': row[5],
-                    'close_price': row[6],
-                    'open_time': row[7],
-                    'close_time': row[8],
-                    'profit': row[9],
-                    'commission': row[10],
-                    'swap': row[11],
-                    'magic': row[12],
-                    'comment': row[13],
-                    'duration_seconds': row[14]
-                })
+            with self._lock:
+                cursor = self._connection().cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(query, params)
+                trades = [dict(row) for row in cursor]
             
-            conn.close()
             return trades
             
         except Exception as e:
@@ -199,50 +209,46 @@ class TradeHistoryManager:
             return []
     
     def get_trade_statistics(self, days=None):
-        """Calculate trade statistics from history"""
-        trades = self.get_trade_history(days=days)
-        
-        if not trades:
-            return {
-                'total_trades': 0,
-                'winning_trades': 0,
-                'losing_trades': 0,
-                'win_rate': 0,
-                'total_profit': 0,
-                'total_loss': 0,
-                'net_profit': 0,
-                'avg_win': 0,
-                'avg_loss': 0,
-                'profit_factor': 0,
-                'avg_duration': 0
-            }
+        """Calculate trade statistics from history (one aggregate query in SQLite)"""
+        query = '''
+            SELECT COUNT(*),
+                   COALESCE(SUM(CASE WHEN profit > 0 THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN profit < 0 THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN profit > 0 THEN profit ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN profit < 0 THEN -profit ELSE 0 END), 0),
+                   COALESCE(AVG(duration_seconds), 0)
+            FROM trade_history
+        '''
+        params = []
+        if days:
+            query += " WHERE close_time >= datetime('now', '-' || ? || ' days')"
+            params.append(int(days))
         
-        winning_trades = [t for t in trades if t['profit'] > 0]
-        losing_trades = [t for t in trades if t['profit'] < 0]
-        
-        total_profit = sum(t['profit'] for t in winning_trades)
-        total_loss = abs(sum(t['profit'] for t in losing_trades))
+        try:
+            with self._lock:
+                row = self._connection().execute(query, params).fetchone()
+        except Exception as e:
+            logging.error(f"Error getting trade statistics: {str(e)}")
+            row = (0, 0, 0, 0, 0, 0)
         
-        avg_duration = sum(t['duration_seconds'] for t in trades) / len(trades)
+        total, wins, losses, total_profit, total_loss, avg_duration = row
         
         return {
-            'total_trades': len(trades),
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
-            'win_rate': len(winning_trades) / len(trades) * 100,
+            'total_trades': total,
+            'winning_trades': wins,
+            'losing_trades': losses,
+            'win_rate': wins / total * 100 if total else 0,
             'total_profit': total_profit,
             'total_loss': total_loss,
             'net_profit': total_profit - total_loss,
-            'avg_win': total_profit / len(winning_trades) if winning_trades else 0,
-            'avg_loss': total_loss / len(losing_trades) if losing_trades else 0,
+            'avg_win': total_profit / wins if wins else 0,
+            'avg_loss': total_loss / losses if losses else 0,
             'profit_factor': total_profit / total_loss if total_loss > 0 else 0,
             'avg_duration': avg_duration
         }
     
     def export_to_csv(self, filename="trade_history.csv", days=None):
         """Export trade history to CSV"""
-        import pandas as pd
-        
         trades = self.get_trade_history(days=days)
         
         if not trades:
@@ -250,8 +256,10 @@ class TradeHistoryManager:
             return False
         
         try:
-            df = pd.DataFrame(trades)
-            df.to_csv(filename, index=False)
+            with open(filename, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=trades[0].keys())
+                writer.writeheader()
+                writer.writerows(trades)
             logging.info(f"Exported {len(trades)} trades to {filename}")
             return True
             
@@ -1,37 +1,125 @@
 import yaml
 import logging
+import logging.handlers
+import math
 import os
-from datetime import datetime
+import re
+import atexit
+import queue
+import time
+import numpy as np
+import copy
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# libyaml's C loader when available (much faster), pure-Python otherwise
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Parsed YAML per absolute path: (st_mtime_ns, st_size, config)
+_CONFIG_CACHE = OrderedDict()
+_CONFIG_CACHE_MAX = 100
+_config_lock = threading.Lock()
 
 def load_config(config_path):
-    """Load configuration from YAML file"""
+    """Load configuration from YAML file (re-parsed only when the file changes)"""
     try:
-        with open(config_path, 'r') as file:
-            config = yaml.safe_load(file)
-        return config
+        st = os.stat(config_path)
+        key = os.path.abspath(config_path)
+        
+        with _config_lock:
+            entry = _CONFIG_CACHE.get(key)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                _CONFIG_CACHE.move_to_end(key)
+                return copy.deepcopy(entry[2])
+        
+        with open(config_path, 'rb') as file:
+            config = yaml.load(file, Loader=_YamlLoader)
+        
+        with _config_lock:
+            _CONFIG_CACHE[key] = (st.st_mtime_ns, st.st_size, config)
+            _CONFIG_CACHE.move_to_end(key)
+            if len(_CONFIG_CACHE) > _CONFIG_CACHE_MAX:
+                _CONFIG_CACHE.popitem(last=False)
+        return copy.deepcopy(config)
     except Exception as e:
         logging.error(f"Error loading config from {config_path}: {str(e)}")
         return {}
 
+def _clear_config_cache():
+    """Drop all cached configs"""
+    with _config_lock:
+        _CONFIG_CACHE.clear()
+
+load_config.cache_clear = _clear_config_cache
+
+# Background thread that owns the real (file/console) log handlers
+_log_listener = None
+_log_listener_running = False  # QueueListener.stop() is not safe to call twice
+
+class _LogListener(logging.handlers.QueueListener):
+    """QueueListener that clears _log_listener_running when stop()ped"""
+    def stop(self):
+        global _log_listener_running
+        super().stop()
+        # The caller may stop the returned listener itself
+        if self is _log_listener:
+            _log_listener_running = False
+
+def _stop_log_listener():
+    """Flush queued records and stop the logging thread"""
+    global _log_listener
+    if _log_listener_running:
+        _log_listener.stop()
+    _log_listener = None
+
+atexit.register(_stop_log_listener)
+
 def setup_logging(log_dir='logs', log_level=logging.INFO):
-    """Setup logging configuration with UTF-8 encoding for emoji support"""
+    """
+    Setup logging configuration with UTF-8 encoding for emoji support.
+    
+    Callers only enqueue records (QueueHandler); file and console writes
+    happen on a QueueListener thread. Returns the listener so the caller
+    can stop() it on shutdown (also done automatically at exit).
+    """
+    global _log_listener, _log_listener_running
+    
     # Create logs directory if not exists
     os.makedirs(log_dir, exist_ok=True)
     
     # Generate log filename with timestamp
     log_filename = f"{log_dir}/trading_{datetime.now().strftime('%Y%m%d')}.log"
     
-    # Configure logging with UTF-8 encoding
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s | %(levelname)s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-        handlers=[
-            logging.FileHandler(log_filename, encoding='utf-8'),  # UTF-8 encoding for file
-            logging.StreamHandler()  # Console output
-        ],
-        force=True  # Force reconfiguration if already configured
+    formatter = logging.Formatter(
+        '%(asctime)s | %(levelname)s | %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
     )
+    file_handler = logging.FileHandler(log_filename, encoding='utf-8')  # UTF-8 encoding for file
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()  # Console output
+    stream_handler.setFormatter(formatter)
+    
+    # Force reconfiguration if already configured
+    _stop_log_listener()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    
+    log_queue = queue.Queue(-1)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(log_level)
+    
+    _log_listener = _LogListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    _log_listener.start()
+    _log_listener_running = True
     
     # Set console handler encoding to UTF-8 on Windows
     import sys
@@ -48,46 +136,67 @@ def setup_logging(log_dir='logs', log_level=logging.INFO):
     # Suppress some noisy loggers
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     logging.getLogger('matplotlib').setLevel(logging.WARNING)
+    
+    return _log_listener
+
+_FMT_CACHE = {}  # currency -> bound str.format
+_PCT_FMT = "{:.2f}%".format
 
 def format_currency(amount, currency='USD'):
     """Format currency for display"""
-    return f"{currency} {amount:,.2f}"
+    fmt = _FMT_CACHE.get(currency)
+    if fmt is None:
+        prefix = currency.replace('{', '{{').replace('}', '}}')
+        fmt = _FMT_CACHE[currency] = (prefix + " {:,.2f}").format
+    return fmt(amount)
+
+@lru_cache(maxsize=1024)
+def pip_multiplier(symbol):
+    """Price-to-pips factor: JPY pairs quote 2 decimals, others 4"""
+    return 100.0 if 'JPY' in symbol else 10000.0
 
 def calculate_pips(price1, price2, symbol):
-    """Calculate pips difference between two prices"""
+    """Calculate pips difference between two prices (arrays dispatch to calculate_pips_vec)"""
+    if isinstance(price1, np.ndarray):
+        return calculate_pips_vec(price1, price2, symbol)
     # Simplified: assumes 4-decimal pairs (EURUSD, etc.)
     # For JPY pairs, use 2 decimals
-    if 'JPY' in symbol:
-        return abs(price1 - price2) * 100
-    else:
-        return abs(price1 - price2) * 10000
+    return abs(price1 - price2) * pip_multiplier(symbol)
+
+def calculate_pips_vec(price1, price2, symbols):
+    """Vectorized calculate_pips; `symbols` is one symbol or an array matching the prices"""
+    symbols = np.asarray(symbols, dtype=str)
+    uniq, inverse = np.unique(symbols, return_inverse=True)
+    multipliers = np.array([pip_multiplier(s) for s in uniq.tolist()])[inverse].reshape(symbols.shape)
+    return np.abs(np.asarray(price1) - np.asarray(price2)) * multipliers
 
 def format_percentage(value):
     """Format percentage for display"""
-    return f"{value:.2f}%"
+    return _PCT_FMT(value)
+
+# 6+ chars of letters and '/', '_', '.' with at least one letter
+# (EURUSD, EUR/USD, EURUSD.s, GOLD.m, ...)
+_SYMBOL_RE = re.compile(r'(?=.*[A-Za-z])[A-Za-z/_.]{6,}')
 
 def validate_symbol(symbol):
     """Validate if symbol format is correct"""
-    if len(symbol) < 6:
-        return False
-    if not symbol.replace('/', '').replace('_', '').replace('.', '').isalpha():
-        return False
-    return True
+    return _SYMBOL_RE.fullmatch(symbol) is not None
+
+_TIMEFRAME_MAP = {
+    'M1': 1,
+    'M5': 5,
+    'M15': 15,
+    'M30': 30,
+    'H1': 60,
+    'H4': 240,
+    'D1': 1440,
+    'W1': 10080,
+    'MN1': 43200
+}
 
 def get_timeframe_minutes(timeframe_str):
     """Convert timeframe string to minutes"""
-    timeframe_map = {
-        'M1': 1,
-        'M5': 5,
-        'M15': 15,
-        'M30': 30,
-        'H1': 60,
-        'H4': 240,
-        'D1': 1440,
-        'W1': 10080,
-        'MN1': 43200
-    }
-    return timeframe_map.get(timeframe_str, 1)
+    return _TIMEFRAME_MAP.get(timeframe_str, 1)
 
 def risk_reward_ratio(entry, stop_loss, take_profit):
     """Calculate risk-reward ratio"""
@@ -102,66 +211,144 @@ def risk_reward_ratio(entry, stop_loss, take_profit):
 class TradingMetrics:
     """Calculate and track trading performance metrics"""
     
-    def __init__(self):
-        self.trades = []
-        self.total_profit = 0
-        self.total_loss = 0
-        self.winning_trades = 0
-        self.losing_trades = 0
+    def __init__(self, capacity=1024):
+        # Structure-of-arrays storage, doubled when full
+        self._profits = np.empty(max(capacity, 1), dtype=np.float64)
+        self._timestamps = np.empty(max(capacity, 1), dtype=np.int64)  # monotonic ns
+        self._n = 0
+        self._info = {}  # trade index -> trade_info, only for trades that have one
+        # Welford running mean / sum of squared deviations
+        self._mean = 0.0
+        self._M2 = 0.0
     
     def add_trade(self, profit, trade_info=None):
         """Add a completed trade"""
-        self.trades.append({
-            'profit': profit,
-            'timestamp': datetime.now(),
-            'info': trade_info
-        })
-        
-        if profit > 0:
-            self.winning_trades += 1
-            self.total_profit += profit
+        n = self._n
+        if n == len(self._profits):
+            self._profits = np.resize(self._profits, 2 * n)
+            self._timestamps = np.resize(self._timestamps, 2 * n)
+        self._profits[n] = profit
+        self._timestamps[n] = time.monotonic_ns()
+        if trade_info is not None:
+            self._info[n] = trade_info
+        n += 1
+        delta = profit - self._mean
+        self._mean += delta / n
+        self._M2 += delta * (profit - self._mean)
+        self._n = n
+    
+    @property
+    def profits(self):
+        """Profit of every trade so far (read-only view)"""
+        view = self._profits[:self._n]
+        view.flags.writeable = False
+        return view
+    
+    def get_trade_times(self):
+        """Wall-clock datetime of every trade, derived from the monotonic stamps"""
+        base = datetime.now()
+        offsets_us = (self._timestamps[:self._n] - time.monotonic_ns()) // 1000
+        return [base + timedelta(microseconds=int(us)) for us in offsets_us]
+    
+    @property
+    def trades(self):
+        """Trades as a list of dicts (built on demand)"""
+        times = self.get_trade_times()
+        return [
+            {
+                'profit': float(self._profits[i]),
+                'timestamp': times[i],
+                'info': self._info.get(i)
+            }
+            for i in range(self._n)
+        ]
+    
+    def _totals(self):
+        """(wins, losses, total_profit, total_loss) from one pass over the profits"""
+        p = self.profits
+        win = p > 0
+        wins = int(np.count_nonzero(win))
+        total_profit = float(p[win].sum())
+        total_loss = float(np.abs(p[~win]).sum())
+        return wins, self._n - wins, total_profit, total_loss
+    
+    @property
+    def winning_trades(self):
+        return int(np.count_nonzero(self.profits > 0))
+    
+    @property
+    def losing_trades(self):
+        return self._n - self.winning_trades
+    
+    @property
+    def total_profit(self):
+        p = self.profits
+        return float(p[p > 0].sum())
+    
+    @property
+    def total_loss(self):
+        p = self.profits
+        return float(np.abs(p[p <= 0]).sum())
+    
+    @staticmethod
+    def _ratios(wins, losses, total_profit, total_loss):
+        """(win_rate, profit_factor, average_win, average_loss) from the totals"""
+        total = wins + losses
+        win_rate = (wins / total) * 100 if total else 0
+        if total_loss == 0:
+            profit_factor = float('inf') if total_profit > 0 else 0
         else:
-            self.losing_trades += 1
-            self.total_loss += abs(profit)
+            profit_factor = total_profit / total_loss
+        average_win = total_profit / wins if wins else 0
+        average_loss = total_loss / losses if losses else 0
+        return win_rate, profit_factor, average_win, average_loss
     
     def get_win_rate(self):
         """Calculate win rate percentage"""
-        total = self.winning_trades + self.losing_trades
-        if total == 0:
-            return 0
-        return (self.winning_trades / total) * 100
+        return self._ratios(*self._totals())[0]
     
     def get_profit_factor(self):
         """Calculate profit factor"""
-        if self.total_loss == 0:
-            return float('inf') if self.total_profit > 0 else 0
-        return self.total_profit / self.total_loss
+        return self._ratios(*self._totals())[1]
     
     def get_average_win(self):
         """Calculate average winning trade"""
-        if self.winning_trades == 0:
-            return 0
-        return self.total_profit / self.winning_trades
+        return self._ratios(*self._totals())[2]
     
     def get_average_loss(self):
         """Calculate average losing trade"""
-        if self.losing_trades == 0:
+        return self._ratios(*self._totals())[3]
+    
+    def get_std(self):
+        """Sample standard deviation of trade profit (O(1), Welford)"""
+        if self._n < 2:
+            return 0
+        return math.sqrt(self._M2 / (self._n - 1))
+    
+    def get_sharpe(self, periods=252):
+        """Per-trade Sharpe ratio annualized by sqrt(periods)"""
+        std = self.get_std()
+        if std == 0:
             return 0
-        return self.total_loss / self.losing_trades
+        return self._mean / std * math.sqrt(periods)
     
     def get_summary(self):
         """Get trading performance summary"""
+        # Every field derives from a single scan of the profits array
+        totals = self._totals()
+        wins, losses, total_profit, total_loss = totals
+        win_rate, profit_factor, average_win, average_loss = self._ratios(*totals)
         return {
-            'total_trades': len(self.trades),
-            'winning_trades': self.winning_trades,
-            'losing_trades': self.losing_trades,
-            'win_rate': self.get_win_rate(),
-            'profit_factor': self.get_profit_factor(),
-            'total_profit': self.total_profit,
-            'total_loss': self.total_loss,
-            'net_profit': self.total_profit - self.total_loss,
-            'average_win': self.get_average_win(),
-            'average_loss': self.get_average_loss()
+            'total_trades': self._n,
+            'winning_trades': wins,
+            'losing_trades': losses,
+            'win_rate': win_rate,
+            'profit_factor': profit_factor,
+            'total_profit': total_profit,
+            'total_loss': total_loss,
+            'net_profit': total_profit - total_loss,
+            'average_win': average_win,
+            'average_loss': average_loss
         }
     
     def print_summary(self):
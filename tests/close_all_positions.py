@@ -1,6 +1,13 @@
+import sys
 import MetaTrader5 as mt5
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+def _send(request):
+    """order_send plus the last_error() of that same call (read in the worker thread)"""
+    result = mt5.order_send(request)
+    return result, (mt5.last_error() if result is None else None)
+
 def close_all_positions():
     """Close all open positions"""
     
@@ -37,27 +44,27 @@ def close_all_positions():
     closed_count = 0
     failed_count = 0
     
+    # Build every close request first (no printing) so they can be sent together.
+    # Symbol info / tick are fetched once per symbol; the loop takes well under
+    # a second, so the tick is still fresh for every position on that symbol.
+    info_cache = {}
+    tick_cache = {}
+    entries = []  # (pos, request, error)
     for pos in positions:
-        print(f"\nClosing position:")
-        print(f"  Ticket: {pos.ticket}")
-        print(f"  Symbol: {pos.symbol}")
-        print(f"  Type: {'BUY' if pos.type == 0 else 'SELL'}")
-        print(f"  Volume: {pos.volume}")
-        print(f"  Open Price: {pos.price_open:.5f}")
-        print(f"  Current Profit: ${pos.profit:.2f}")
-        
         # Get symbol info
-        symbol_info = mt5.symbol_info(pos.symbol)
+        if pos.symbol not in info_cache:
+            info_cache[pos.symbol] = mt5.symbol_info(pos.symbol)
+        symbol_info = info_cache[pos.symbol]
         if symbol_info is None:
-            print(f"  ❌ Failed to get symbol info")
-            failed_count += 1
+            entries.append((pos, None, "Failed to get symbol info"))
             continue
         
         # Get current tick
-        tick = mt5.symbol_info_tick(pos.symbol)
+        if pos.symbol not in tick_cache:
+            tick_cache[pos.symbol] = mt5.symbol_info_tick(pos.symbol)
+        tick = tick_cache[pos.symbol]
         if tick is None:
-            print(f"  ❌ Failed to get tick")
-            failed_count += 1
+            entries.append((pos, None, "Failed to get tick"))
             continue
         
         # Determine filling mode
@@ -73,7 +80,7 @@ def close_all_positions():
         close_type = mt5.ORDER_TYPE_SELL if pos.type == 0 else mt5.ORDER_TYPE_BUY
         close_price = tick.bid if pos.type == 0 else tick.ask
         
-        request = {
+        entries.append((pos, {
             "action": mt5.TRADE_ACTION_DEAL,
             "position": pos.ticket,
             "symbol": pos.symbol,
@@ -85,35 +92,57 @@ def close_all_positions():
             "comment": "Close all positions",
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": type_filling,
-        }
+        }, None))
+    
+    # Send close orders concurrently: wall time ~ one round-trip, not N
+    requests = [request for _, request, _ in entries if request is not None]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = executor.map(_send, requests)
+    
+    # Report is buffered and written once (one stdout write instead of ~10/position)
+    out = []
+    for pos, request, error in entries:
+        out.append(f"\nClosing position:")
+        out.append(f"  Ticket: {pos.ticket}")
+        out.append(f"  Symbol: {pos.symbol}")
+        out.append(f"  Type: {'BUY' if pos.type == 0 else 'SELL'}")
+        out.append(f"  Volume: {pos.volume}")
+        out.append(f"  Open Price: {pos.price_open:.5f}")
+        out.append(f"  Current Profit: ${pos.profit:.2f}")
         
-        # Send close order
-        result = mt5.order_send(request)
+        if error:
+            out.append(f"  ❌ {error}")
+            failed_count += 1
+            continue
+        
+        result, send_error = next(results)
         
         if result is None:
-            print(f"  ❌ Failed to send close order: {mt5.last_error()}")
+            out.append(f"  ❌ Failed to send close order: {send_error}")
             failed_count += 1
             continue
         
         if result.retcode == mt5.TRADE_RETCODE_DONE:
-            print(f"  ✅ Position closed successfully!")
-            print(f"  Close Price: {result.price:.5f}")
-            print(f"  Final Profit: ${pos.profit:.2f}")
+            out.append(f"  ✅ Position closed successfully!")
+            out.append(f"  Close Price: {result.price:.5f}")
+            out.append(f"  Final Profit: ${pos.profit:.2f}")
             closed_count += 1
             total_profit += pos.profit
         else:
-            print(f"  ❌ Failed to close: {result.retcode} - {result.comment}")
+            out.append(f"  ❌ Failed to close: {result.retcode} - {result.comment}")
             failed_count += 1
     
-    print()
-    print("="*70)
-    print("📊 SUMMARY:")
-    print("="*70)
-    print(f"Total Positions: {len(positions)}")
-    print(f"Successfully Closed: {closed_count}")
-    print(f"Failed to Close: {failed_count}")
-    print(f"Total Profit/Loss: ${total_profit:.2f}")
-    print("="*70)
+    out.append("")
+    out.append("="*70)
+    out.append("📊 SUMMARY:")
+    out.append("="*70)
+    out.append(f"Total Positions: {len(positions)}")
+    out.append(f"Successfully Closed: {closed_count}")
+    out.append(f"Failed to Close: {failed_count}")
+    out.append(f"Total Profit/Loss: ${total_profit:.2f}")
+    out.append("="*70)
+    sys.stdout.write("\n".join(out) + "\n")
+    sys.stdout.flush()
     
     mt5.shutdown()
 
@@ -1,6 +1,69 @@
 import MetaTrader5 as mt5
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import chain
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional, plain pandas column build below
+    pa = None
+
+try:
+    import xlsxwriter
+except ImportError:  # optional, falls back to pandas + openpyxl
+    xlsxwriter = None
+
+
+def _to_frame(records):
+    """MT5 namedtuples -> DataFrame, built column by column"""
+    names = list(records[0]._fields)
+    columns = zip(*records)
+    if pa is not None:
+        return pa.table([pa.array(c) for c in columns], names=names).to_pandas()
+    return pd.DataFrame(dict(zip(names, columns)))
+
+
+def _fetch_history(fetch, from_date, to_date, chunk=timedelta(days=1)):
+    """Call an MT5 history getter over day-sized ranges concurrently, in time order"""
+    ranges = []
+    start = from_date
+    while start < to_date:
+        end = min(start + chunk, to_date)
+        ranges.append((start, end))
+        start = end
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        batches = list(executor.map(lambda r: fetch(*r) or (), ranges))
+    
+    # Range ends are inclusive on the terminal side, drop boundary duplicates
+    unique = {item.ticket: item for item in chain.from_iterable(batches)}
+    return tuple(unique.values())
+
+
+def _write_excel(filename, sheets):
+    """Write {sheet_name: DataFrame} to xlsx, streaming rows when xlsxwriter is available"""
+    if xlsxwriter is None:
+        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+            for name, frame in sheets.items():
+                frame.to_excel(writer, sheet_name=name, index=False)
+        return
+    
+    # constant_memory flushes each row once the next one starts, so rows are
+    # written strictly in order (pandas' to_excel writes column by column)
+    workbook = xlsxwriter.Workbook(filename, {
+        'constant_memory': True,
+        'strings_to_numbers': False,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    })
+    for name, frame in sheets.items():
+        sheet = workbook.add_worksheet(name)
+        sheet.write_row(0, 0, list(frame.columns))
+        for row, values in enumerate(frame.astype(object).itertuples(index=False, name=None), 1):
+            sheet.write_row(row, 0, values)
+    workbook.close()
+
 
 def export_trades_to_excel(days=7):
     """Export trading history to Excel"""
@@ -27,73 +90,81 @@ def export_trades_to_excel(days=7):
     from_date = datetime.now() - timedelta(days=days)
     to_date = datetime.now()
     
-    deals = mt5.history_deals_get(from_date, to_date)
+    deals = _fetch_history(mt5.history_deals_get, from_date, to_date)
     
-    if deals is None or len(deals) == 0:
+    if len(deals) == 0:
         print("No deals found")
         mt5.shutdown()
         return
     
-    # Convert to DataFrame
-    deals_list = []
-    for deal in deals:
-        deals_list.append({
-            'Time': datetime.fromtimestamp(deal.time),
-            'Ticket': deal.ticket,
-            'Order': deal.order,
-            'Symbol': deal.symbol,
-            'Type': 'BUY' if deal.type == 0 else 'SELL',
-            'Entry': 'IN' if deal.entry == 0 else 'OUT',
-            'Volume': deal.volume,
-            'Price': deal.price,
-            'Commission': deal.commission,
-            'Swap': deal.swap,
-            'Profit': deal.profit,
-            'Comment': deal.comment
-        })
-    
-    df = pd.DataFrame(deals_list)
+    # Convert to DataFrame (columnar, no per-row dicts)
+    raw = _to_frame(deals)
+    df = pd.DataFrame({
+        'Time': pd.to_datetime(raw['time'], unit='s'),
+        'Ticket': raw['ticket'],
+        'Order': raw['order'],
+        'Symbol': raw['symbol'],
+        'Type': np.where(raw['type'] == 0, 'BUY', 'SELL'),
+        'Entry': np.where(raw['entry'] == 0, 'IN', 'OUT'),
+        'Volume': raw['volume'],
+        'Price': raw['price'],
+        'Commission': raw['commission'],
+        'Swap': raw['swap'],
+        'Profit': raw['profit'],
+        'Comment': raw['comment']
+    })
     
     # Get orders
-    orders = mt5.history_orders_get(from_date, to_date)
-    orders_list = []
+    orders = _fetch_history(mt5.history_orders_get, from_date, to_date)
     
     if orders:
-        for order in orders:
-            orders_list.append({
-                'Time Setup': datetime.fromtimestamp(order.time_setup),
-                'Time Done': datetime.fromtimestamp(order.time_done),
-                'Ticket': order.ticket,
-                'Symbol': order.symbol,
-                'Type': 'BUY' if order.type == 0 else 'SELL',
-                'Volume Requested': order.volume_initial,
-                'Volume Executed': order.volume_current,
-                'Price': order.price_open,
-                'SL': order.sl,
-                'TP': order.tp,
-                'State': order.state,
-                'Comment': order.comment
-            })
-    
-    df_orders = pd.DataFrame(orders_list)
+        raw = _to_frame(orders)
+        df_orders = pd.DataFrame({
+            'Time Setup': pd.to_datetime(raw['time_setup'], unit='s'),
+            'Time Done': pd.to_datetime(raw['time_done'], unit='s'),
+            'Ticket': raw['ticket'],
+            'Symbol': raw['symbol'],
+            'Type': np.where(raw['type'] == 0, 'BUY', 'SELL'),
+            'Volume Requested': raw['volume_initial'],
+            'Volume Executed': raw['volume_current'],
+            'Price': raw['price_open'],
+            'SL': raw['sl'],
+            'TP': raw['tp'],
+            'State': raw['state'],
+            'Comment': raw['comment']
+        })
+    else:
+        df_orders = pd.DataFrame()
     
     # Calculate statistics
     closed_trades = df[df['Entry'] == 'OUT'].copy()
     
     if len(closed_trades) > 0:
+        # One grouped pass over Profit: sign -1 = loss, 0 = flat, 1 = win
+        profit = closed_trades['Profit']
+        grouped = profit.groupby(np.sign(profit.values)).agg(['count', 'sum', 'mean'])
+        empty = {'count': 0, 'sum': 0, 'mean': 0}
+        win_row = grouped.loc[1.0] if 1.0 in grouped.index else empty
+        loss_row = grouped.loc[-1.0] if -1.0 in grouped.index else empty
+        extremes = profit.agg(['max', 'min'])
+        
+        total_profit = profit.sum()
+        total_commission = closed_trades['Commission'].sum()
+        total_swap = closed_trades['Swap'].sum()
+        
         stats = {
             'Total Trades': len(closed_trades),
-            'Winning Trades': len(closed_trades[closed_trades['Profit'] > 0]),
-            'Losing Trades': len(closed_trades[closed_trades['Profit'] < 0]),
-            'Win Rate (%)': len(closed_trades[closed_trades['Profit'] > 0]) / len(closed_trades) * 100,
-            'Total Profit': closed_trades['Profit'].sum(),
-            'Total Commission': closed_trades['Commission'].sum(),
-            'Total Swap': closed_trades['Swap'].sum(),
-            'Net Profit': closed_trades['Profit'].sum() + closed_trades['Commission'].sum() + closed_trades['Swap'].sum(),
-            'Average Win': closed_trades[closed_trades['Profit'] > 0]['Profit'].mean() if len(closed_trades[closed_trades['Profit'] > 0]) > 0 else 0,
-            'Average Loss': closed_trades[closed_trades['Profit'] < 0]['Profit'].mean() if len(closed_trades[closed_trades['Profit'] < 0]) > 0 else 0,
-            'Largest Win': closed_trades['Profit'].max(),
-            'Largest Loss': closed_trades['Profit'].min(),
+            'Winning Trades': int(win_row['count']),
+            'Losing Trades': int(loss_row['count']),
+            'Win Rate (%)': win_row['count'] / len(closed_trades) * 100,
+            'Total Profit': total_profit,
+            'Total Commission': total_commission,
+            'Total Swap': total_swap,
+            'Net Profit': total_profit + total_commission + total_swap,
+            'Average Win': win_row['mean'],
+            'Average Loss': loss_row['mean'],
+            'Largest Win': extremes['max'],
+            'Largest Loss': extremes['min'],
         }
         
         df_stats = pd.DataFrame([stats])
@@ -103,11 +174,11 @@ def export_trades_to_excel(days=7):
     # Export to Excel
     filename = f"trading_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     
-    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Deals', index=False)
-        df_orders.to_excel(writer, sheet_name='Orders', index=False)
-        if not df_stats.empty:
-            df_stats.to_excel(writer, sheet_name='Statistics', index=False)
+    # Small Statistics sheet first, the large Deals/Orders sheets stream after it
+    sheets = {'Statistics': df_stats} if not df_stats.empty else {}
+    sheets['Deals'] = df
+    sheets['Orders'] = df_orders
+    _write_excel(filename, sheets)
     
     print(f"✅ Report exported: {filename}")
     
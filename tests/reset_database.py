@@ -1,5 +1,10 @@
 """
 Reset Database - Hapus dan buat ulang database
+
+Catatan untuk penulis tick/ohlc: tulis dalam batch (>= 1000 baris)
+    BEGIN; cursor.executemany(INSERT ...); COMMIT;
+bukan satu INSERT + commit per tick. Database dibuat dalam mode WAL,
+dan koneksi penulis sebaiknya juga set PRAGMA synchronous=NORMAL.
 """
 import os
 import sqlite3
@@ -23,12 +28,28 @@ def reset_database():
         print(f"✅ Database lama dihapus: {DB_PATH}")
     else:
         print("ℹ️  Database tidak ditemukan, membuat baru...")
-    
+
+    # Sisa -wal/-shm dari proses yang crash bisa di-replay ke file baru
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+            print(f"✅ File {suffix} lama dihapus: {DB_PATH + suffix}")
+
     # Create new database
     try:
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         
+        # journal_mode=WAL tersimpan di file DB (berlaku untuk semua koneksi);
+        # sisanya per-koneksi, dipakai selama pembuatan schema
+        cursor.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+        """)
+        
         # Create ticks table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS ticks (
@@ -61,6 +82,7 @@ def reset_database():
         # Create indexes
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_ticks_symbol_time ON ticks(symbol, timestamp)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_ohlc_symbol_time ON ohlc(symbol, timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ticks_time ON ticks(time_msc)')
         
         conn.commit()
         conn.close()
@@ -69,7 +91,8 @@ def reset_database():
         print("\n📊 Struktur database:")
         print("  - Table: ticks (tick data)")
         print("  - Table: ohlc (candle data)")
-        print("  - Indexes: symbol + timestamp")
+        print("  - Indexes: symbol + timestamp, time_msc")
+        print("  - Journal: WAL")
         
     except Exception as e:
         print(f"❌ Error membuat database: {str(e)}")
@@ -4,60 +4,81 @@ Quick utility to view upcoming forex news events
 """
 import sys
 import os
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.news_collector import NewsCollector
+from src.news_collector import NewsCollector, group_news_by_impact
+
+def separator(char="=", length=80):
+    return char * length
 
 def print_separator(char="=", length=80):
-    print(char * length)
+    print(separator(char, length))
 
-def format_event_time(event_time_str):
-    """Format event time for display"""
-    try:
-        event_time = datetime.strptime(event_time_str, '%Y-%m-%d %H:%M:%S')
-        now = datetime.now()
-        
-        # Check if today, tomorrow, or specific date
-        if event_time.date() == now.date():
-            date_str = "TODAY"
-        elif event_time.date() == (now.date()):
-            date_str = "TOMORROW"
-        else:
-            date_str = event_time.strftime('%a %m/%d')
-        
-        time_str = event_time.strftime('%H:%M')
-        
-        # Calculate time until event
-        time_diff = event_time - now
-        hours_until = int(time_diff.total_seconds() / 3600)
-        
-        if hours_until < 0:
-            time_until = "PAST"
-        elif hours_until == 0:
-            minutes_until = int(time_diff.total_seconds() / 60)
-            time_until = f"in {minutes_until}m"
-        elif hours_until < 24:
-            time_until = f"in {hours_until}h"
-        else:
-            days_until = int(hours_until / 24)
-            time_until = f"in {days_until}d"
-        
-        return f"[{date_str} {time_str}]", time_until
-        
-    except Exception as e:
-        return event_time_str, ""
+def write_lines(lines):
+    """Write buffered output lines with a single stdout write"""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+def parse_event_times(events, now):
+    """Parse every event_time once; store the datetime and seconds until it on the event"""
+    for event in events:
+        try:
+            event_time = datetime.fromisoformat(event['event_time'])
+            event['event_dt'] = event_time
+            event['seconds_until'] = (event_time - now).total_seconds()
+        except (TypeError, ValueError):
+            event['event_dt'] = None
+            event['seconds_until'] = None
+
+def format_event_time(event, now):
+    """Format a pre-parsed event time for display (see parse_event_times)"""
+    event_time = event['event_dt']
+    if event_time is None:
+        return event['event_time'], ""
+    
+    # Check if today, tomorrow, or specific date
+    if event_time.date() == now.date():
+        date_str = "TODAY"
+    elif event_time.date() == now.date() + timedelta(days=1):
+        date_str = "TOMORROW"
+    else:
+        date_str = event_time.strftime('%a %m/%d')
+    
+    time_str = event_time.strftime('%H:%M')
+    
+    # Calculate time until event
+    seconds_until = event['seconds_until']
+    hours_until = int(seconds_until / 3600)
+    
+    if hours_until < 0:
+        time_until = "PAST"
+    elif hours_until == 0:
+        minutes_until = int(seconds_until / 60)
+        time_until = f"in {minutes_until}m"
+    elif hours_until < 24:
+        time_until = f"in {hours_until}h"
+    else:
+        days_until = int(hours_until / 24)
+        time_until = f"in {days_until}d"
+    
+    return f"[{date_str} {time_str}]", time_until
 
 def display_news(hours=48, impact_filter=None):
     """Display upcoming news"""
+    # Lines are buffered and written once at the end (single stdout write)
+    out = []
+    emit = out.append
     
-    print()
-    print_separator("=")
-    print("UPCOMING FOREX NEWS EVENTS")
-    print_separator("=")
-    print()
+    emit("")
+    emit(separator("="))
+    emit("UPCOMING FOREX NEWS EVENTS")
+    emit(separator("="))
+    emit("")
     
     try:
         nc = NewsCollector()
@@ -71,107 +92,107 @@ def display_news(hours=48, impact_filter=None):
             impact_text = "ALL IMPACTS"
         
         if not news:
-            print(f"No {impact_text.lower()} news events found for the next {hours} hours.")
-            print()
+            emit(f"No {impact_text.lower()} news events found for the next {hours} hours.")
+            emit("")
             return
         
-        print(f"Showing {len(news)} {impact_text} events for the next {hours} hours")
-        print()
+        emit(f"Showing {len(news)} {impact_text} events for the next {hours} hours")
+        emit("")
+        now = datetime.now()
+        parse_event_times(news, now)
         
-        # Group by impact level
-        high_impact = [n for n in news if n['impact'] == 'High']
-        medium_impact = [n for n in news if n['impact'] == 'Medium']
-        low_impact = [n for n in news if n['impact'] == 'Low']
+        # Group by impact level (single pass)
+        groups = group_news_by_impact(news)
+        high_impact = groups['High']
+        medium_impact = groups['Medium']
+        low_impact = groups['Low']
         
         # Display HIGH impact first
         if high_impact and (not impact_filter or impact_filter == 'High'):
-            print_separator("-")
-            print(f"HIGH IMPACT EVENTS ({len(high_impact)})")
-            print_separator("-")
+            emit(separator("-"))
+            emit(f"HIGH IMPACT EVENTS ({len(high_impact)})")
+            emit(separator("-"))
             
             for event in high_impact:
-                time_str, time_until = format_event_time(event['event_time'])
+                time_str, time_until = format_event_time(event, now)
                 
                 title = event['title']
                 if len(title) > 50:
                     title = title[:47] + "..."
                 
-                print(f"{time_str:20} {event['currency']:3} | {title}")
-                
-                if time_until:
-                    print(f"{'':20} ⏰  {time_until}", end="")
+                emit(f"{time_str:20} {event['currency']:3} | {title}")
                 
+                line = f"{'':20} ⏰  {time_until}" if time_until else ""
                 if event['forecast'] or event['previous']:
-                    print(f" | Forecast: {event['forecast'] or 'N/A':>8} | Previous: {event['previous'] or 'N/A':>8}")
-                else:
-                    print()
+                    line += f" | Forecast: {event['forecast'] or 'N/A':>8} | Previous: {event['previous'] or 'N/A':>8}"
+                emit(line)
                 
-                print()
+                emit("")
         
         # Display MEDIUM impact
         if medium_impact and (not impact_filter or impact_filter == 'Medium'):
-            print_separator("-")
-            print(f"MEDIUM IMPACT EVENTS ({len(medium_impact)})")
-            print_separator("-")
+            emit(separator("-"))
+            emit(f"MEDIUM IMPACT EVENTS ({len(medium_impact)})")
+            emit(separator("-"))
             
             for event in medium_impact[:10]:  # Show only first 10
-                time_str, time_until = format_event_time(event['event_time'])
+                time_str, time_until = format_event_time(event, now)
                 
                 title = event['title']
                 if len(title) > 50:
                     title = title[:47] + "..."
                 
-                print(f"{time_str:20} {event['currency']:3} | {title}")
+                emit(f"{time_str:20} {event['currency']:3} | {title}")
                 
                 if time_until and event['forecast']:
-                    print(f"{'':20} ⏰  {time_until} | Forecast: {event['forecast']}")
+                    emit(f"{'':20} ⏰  {time_until} | Forecast: {event['forecast']}")
                 
-                print()
+                emit("")
             
             if len(medium_impact) > 10:
-                print(f"... and {len(medium_impact) - 10} more medium impact events")
-                print()
+                emit(f"... and {len(medium_impact) - 10} more medium impact events")
+                emit("")
         
         # Display LOW impact (summary only)
         if low_impact and not impact_filter:
-            print_separator("-")
-            print(f"LOW IMPACT EVENTS ({len(low_impact)}) - Summary")
-            print_separator("-")
-            print(f"There are {len(low_impact)} low impact events scheduled.")
-            print("Use --impact Low to see full details.")
-            print()
+            emit(separator("-"))
+            emit(f"LOW IMPACT EVENTS ({len(low_impact)}) - Summary")
+            emit(separator("-"))
+            emit(f"There are {len(low_impact)} low impact events scheduled.")
+            emit("Use --impact Low to see full details.")
+            emit("")
         
         # Summary
-        print_separator("=")
-        print("SUMMARY")
-        print_separator("=")
-        print(f"Total events:  {len(news)}")
+        emit(separator("="))
+        emit("SUMMARY")
+        emit(separator("="))
+        emit(f"Total events:  {len(news)}")
         if not impact_filter:
-            print(f"  High impact:   {len(high_impact)}")
-            print(f"  Medium impact: {len(medium_impact)}")
-            print(f"  Low impact:    {len(low_impact)}")
-        print()
+            emit(f"  High impact:   {len(high_impact)}")
+            emit(f"  Medium impact: {len(medium_impact)}")
+            emit(f"  Low impact:    {len(low_impact)}")
+        emit("")
         
         # Show currencies
-        currencies = {}
-        for event in news:
-            curr = event['currency']
-            if curr:
-                currencies[curr] = currencies.get(curr, 0) + 1
+        top_currencies = Counter(e['currency'] for e in news if e['currency']).most_common(10)
         
-        if currencies:
-            print("Events by currency:")
-            for curr, count in sorted(currencies.items(), key=lambda x: x[1], reverse=True)[:10]:
-                print(f"  {curr}: {count}")
+        if top_currencies:
+            emit("Events by currency:")
+            for curr, count in top_currencies:
+                emit(f"  {curr}: {count}")
         
-        print_separator("=")
-        print()
+        emit(separator("="))
+        emit("")
         
     except Exception as e:
+        write_lines(out)
+        out.clear()
         print(f"❌ Error: {str(e)}")
         import traceback
         traceback.print_exc()
         print()
+    finally:
+        write_lines(out)
 
 def display_today_news():
     """Display today's high impact news"""
@@ -192,9 +213,11 @@ def display_today_news():
         
         print(f"Found {len(news)} high impact events today")
         print()
+        now = datetime.now()
+        parse_event_times(news, now)
         
         for event in news:
-            time_str, time_until = format_event_time(event['event_time'])
+            time_str, time_until = format_event_time(event, now)
             
             print(f"{time_str:20} {event['currency']:3} | {event['title']}")
             
@@ -2,8 +2,13 @@
 Test News Collector Functionality
 """
 import MetaTrader5 as mt5
+import contextlib
+import io
+import sqlite3
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -11,6 +16,44 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from src.news_collector import NewsCollector
 from src.utils import setup_logging
 
+def _open(path):
+    """Buka koneksi SQLite dengan WAL + synchronous=NORMAL (reader tidak diblok writer)"""
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.executescript(
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA cache_size=-65536;"
+    )
+    return conn
+
+# Satu NewsCollector dipakai bersama oleh semua test, koneksi satu per thread
+_NC = None
+_NC_LOCK = threading.Lock()
+_CONNS = {}
+
+def _collector():
+    """NewsCollector bersama (dibuat sekali)"""
+    global _NC
+    with _NC_LOCK:
+        if _NC is None:
+            _NC = NewsCollector()
+    return _NC
+
+def _db(path):
+    """Koneksi bersama per (path database, thread) (lihat _open)"""
+    key = (path, threading.get_ident())
+    conn = _CONNS.get(key)
+    if conn is None:
+        conn = _CONNS[key] = _open(path)
+    return conn
+
+def _close_all():
+    for conn in _CONNS.values():
+        conn.close()
+    _CONNS.clear()
+
 def test_mt5_connection():
     """Test MT5 connection"""
     print("="*80)
@@ -49,7 +92,7 @@ def test_news_database_init():
     print("="*80)
     
     try:
-        nc = NewsCollector()
+        nc = _collector()
         print("✓ NewsCollector initialized")
         print(f"  Database path: {nc.db_path}")
         
@@ -61,14 +104,7 @@ def test_news_database_init():
             return False
         
         # Check if news table exists
-        import sqlite3
-        conn = sqlite3.connect(nc.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='news'")
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
+        if nc.has_table('news'):
             print("✓ News table exists")
         else:
             print("❌ News table not found")
@@ -89,7 +125,7 @@ def test_fetch_mt5_calendar():
     print("="*80)
     
     try:
-        nc = NewsCollector()
+        nc = _collector()
         
         print("Fetching news from MT5 calendar...")
         count = nc.update_news(days_ahead=7)
@@ -116,7 +152,7 @@ def test_get_upcoming_news():
     print("="*80)
     
     try:
-        nc = NewsCollector()
+        nc = _collector()
         
         # Get upcoming high-impact news
         print("Getting upcoming HIGH impact news (next 48 hours)...")
@@ -135,21 +171,17 @@ def test_get_upcoming_news():
         
         print()
         
-        # Get all upcoming news
+        # Get all upcoming news (counts only, aggregated in SQL)
         print("Getting ALL upcoming news (next 24 hours)...")
-        all_news = nc.get_upcoming_news(hours=24)
+        counts = nc.get_upcoming_impact_counts(hours=24)
+        total = sum(counts.values())
         
-        if all_news:
-            print(f"✓ Found {len(all_news)} total upcoming events")
-            
-            # Count by impact
-            high_count = sum(1 for n in all_news if n['impact'] == 'High')
-            medium_count = sum(1 for n in all_news if n['impact'] == 'Medium')
-            low_count = sum(1 for n in all_news if n['impact'] == 'Low')
+        if total:
+            print(f"✓ Found {total} total upcoming events")
             
-            print(f"  High impact:   {high_count}")
-            print(f"  Medium impact: {medium_count}")
-            print(f"  Low impact:    {low_count}")
+            print(f"  High impact:   {counts['High']}")
+            print(f"  Medium impact: {counts['Medium']}")
+            print(f"  Low impact:    {counts['Low']}")
         else:
             print("⚠ No upcoming news found")
         
@@ -170,7 +202,7 @@ def test_get_recent_news():
     print("="*80)
     
     try:
-        nc = NewsCollector()
+        nc = _collector()
         
         # Get recent high-impact news
         print("Getting recent HIGH impact news (last 24 hours)...")
@@ -204,47 +236,52 @@ def test_database_content():
     print("="*80)
     
     try:
-        import sqlite3
-        
         db_path = 'data/database/trading_data.db'
         if not os.path.exists(db_path):
             print("❌ Database not found")
             return False
         
-        conn = sqlite3.connect(db_path)
+        conn = _db(db_path)
         cursor = conn.cursor()
         
+        # Semua agregat dalam satu query, baris ditandai per jenis
+        cursor.execute("""
+            SELECT 'total', NULL, COUNT(*) FROM news
+            UNION ALL
+            SELECT 'impact', impact, COUNT(*) FROM news GROUP BY impact
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'currency', currency, COUNT(*) FROM news
+                GROUP BY currency ORDER BY COUNT(*) DESC LIMIT 10
+            )
+            UNION ALL
+            SELECT 'range', MIN(event_time), MAX(event_time) FROM news
+        """)
+        rows = {'total': [], 'impact': [], 'currency': [], 'range': []}
+        for tag, key, value in cursor:
+            rows[tag].append((key, value))
+        
         # Count total news
-        cursor.execute("SELECT COUNT(*) FROM news")
-        total_count = cursor.fetchone()[0]
+        total_count = rows['total'][0][1]
         print(f"Total news items in database: {total_count}")
         
         # Count by impact
-        cursor.execute("SELECT impact, COUNT(*) FROM news GROUP BY impact")
-        impact_counts = cursor.fetchall()
-        
         print("\nNews by impact level:")
-        for impact, count in impact_counts:
+        for impact, count in rows['impact']:
             print(f"  {impact}: {count}")
         
         # Count by currency
-        cursor.execute("SELECT currency, COUNT(*) FROM news GROUP BY currency ORDER BY COUNT(*) DESC LIMIT 10")
-        currency_counts = cursor.fetchall()
-        
         print("\nTop 10 currencies:")
-        for currency, count in currency_counts:
+        for currency, count in rows['currency']:
             print(f"  {currency}: {count}")
         
         # Get date range
-        cursor.execute("SELECT MIN(event_time), MAX(event_time) FROM news")
-        min_date, max_date = cursor.fetchone()
+        min_date, max_date = rows['range'][0]
         
         print(f"\nDate range:")
         print(f"  Earliest: {min_date}")
         print(f"  Latest:   {max_date}")
         
-        conn.close()
-        
         print()
         return True
         
@@ -255,60 +292,121 @@ def test_database_content():
         print()
         return False
 
+class _ThreadOutput(io.TextIOBase):
+    """Pengganti sys.stdout: thread yang punya buffer menulis ke buffernya sendiri"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            return self._stream.write(text)
+        return buffer.write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+@contextlib.contextmanager
+def buffered_print(flush=True):
+    """
+    Tampung semua print di dalam blok ke StringIO, lalu (flush=True) tulis
+    sekali ke stdout. Di bawah _ThreadOutput buffernya per thread.
+    """
+    buffer = io.StringIO()
+    stdout = sys.stdout
+    if isinstance(stdout, _ThreadOutput):
+        stdout._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            stdout._local.buffer = None
+            if flush:
+                stdout.write(buffer.getvalue())
+    else:
+        sys.stdout = buffer
+        try:
+            yield buffer
+        finally:
+            sys.stdout = stdout
+            if flush:
+                stdout.write(buffer.getvalue())
+
+def _run_test(test):
+    """Jalankan satu test dengan output di-buffer; return (name, result, output)"""
+    name, test_func = test
+    with buffered_print(flush=False) as buffer:
+        try:
+            result = test_func()
+        except Exception as e:
+            print(f"❌ CRITICAL ERROR in {name}: {str(e)}")
+            result = False
+    return name, result, buffer.getvalue()
+
 def main():
     """Run all tests"""
-    print("\n")
-    print("╔" + "="*78 + "╗")
-    print("║" + " "*20 + "NEWS COLLECTOR TEST SUITE" + " "*33 + "║")
-    print("╚" + "="*78 + "╝")
-    print()
+    with buffered_print():
+        print("\n")
+        print("╔" + "="*78 + "╗")
+        print("║" + " "*20 + "NEWS COLLECTOR TEST SUITE" + " "*33 + "║")
+        print("╚" + "="*78 + "╝")
+        print()
     
     # Setup logging
     setup_logging(log_level='WARNING')
     
-    tests = [
-        ("MT5 Connection", test_mt5_connection),
-        ("Database Init", test_news_database_init),
-        ("Fetch MT5 Calendar", test_fetch_mt5_calendar),
-        ("Get Upcoming News", test_get_upcoming_news),
-        ("Get Recent News", test_get_recent_news),
-        ("Database Content", test_database_content),
+    # Stage dijalankan berurutan (MT5 dulu, fetch sebelum query);
+    # test di dalam satu stage jalan paralel
+    stages = [
+        [("MT5 Connection", test_mt5_connection)],
+        [("Database Init", test_news_database_init),
+         ("Fetch MT5 Calendar", test_fetch_mt5_calendar)],
+        [("Get Upcoming News", test_get_upcoming_news),
+         ("Get Recent News", test_get_recent_news),
+         ("Database Content", test_database_content)],
     ]
     
     results = []
     
-    for name, test_func in tests:
-        try:
-            result = test_func()
-            results.append((name, result))
-        except Exception as e:
-            print(f"❌ CRITICAL ERROR in {name}: {str(e)}")
-            results.append((name, False))
+    # Output tiap test di-buffer lalu dicetak sesuai urutan test
+    stdout = sys.stdout
+    sys.stdout = _ThreadOutput(stdout)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for stage in stages:
+                for name, result, output in executor.map(_run_test, stage):
+                    stdout.write(output)
+                    results.append((name, result))
+    finally:
+        sys.stdout = stdout
     
     # Summary
-    print("="*80)
-    print("TEST SUMMARY")
-    print("="*80)
-    
     passed = sum(1 for _, result in results if result)
     total = len(results)
     
-    for name, result in results:
-        status = "✓ PASS" if result else "✗ FAIL"
-        print(f"{status} | {name}")
-    
-    print("-"*80)
-    print(f"Results: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
-    
-    if passed == total:
-        print("\n🎉 All tests passed! News collector is working correctly.")
-    else:
-        print(f"\n⚠ {total - passed} test(s) failed. Please check the errors above.")
-    
-    print("="*80)
-    print()
+    with buffered_print():
+        print("="*80)
+        print("TEST SUMMARY")
+        print("="*80)
+        
+        for name, result in results:
+            status = "✓ PASS" if result else "✗ FAIL"
+            print(f"{status} | {name}")
+        
+        print("-"*80)
+        print(f"Results: {passed}/{total} tests passed ({passed/total*100:.1f}%)")
+        
+        if passed == total:
+            print("\n🎉 All tests passed! News collector is working correctly.")
+        else:
+            print(f"\n⚠ {total - passed} test(s) failed. Please check the errors above.")
+        
+        print("="*80)
+        print()
     
     # Cleanup
+    _close_all()
     mt5.shutdown()
 
 if __name__ == "__main__":
@@ -1,6 +1,13 @@
 import MetaTrader5 as mt5
 import time
 
+# filling_mode bitmask -> filling type, first supported wins (FOK, then IOC)
+_FILL = (
+    (1, mt5.ORDER_FILLING_FOK, "ORDER_FILLING_FOK"),
+    (2, mt5.ORDER_FILLING_IOC, "ORDER_FILLING_IOC"),
+)
+_FILL_DEFAULT = (mt5.ORDER_FILLING_RETURN, "ORDER_FILLING_RETURN")
+
 # Initialize
 if not mt5.initialize():
     print("MT5 init failed")
@@ -65,15 +72,10 @@ print(f"Volume Step: {symbol_info.volume_step}")
 
 filling_mode = symbol_info.filling_mode
 
-if filling_mode & 1:  # Support FOK
-    filling_type = mt5.ORDER_FILLING_FOK
-    print(f"\nUsing: ORDER_FILLING_FOK")
-elif filling_mode & 2:  # Support IOC
-    filling_type = mt5.ORDER_FILLING_IOC
-    print(f"\nUsing: ORDER_FILLING_IOC")
-else:
-    filling_type = mt5.ORDER_FILLING_RETURN
-    print(f"\nUsing: ORDER_FILLING_RETURN")
+filling_type, filling_name = next(
+    ((fill, name) for bit, fill, name in _FILL if filling_mode & bit), _FILL_DEFAULT
+)
+print(f"\nUsing: {filling_name}")
 
 # PERBAIKAN 2: Lot size yang benar
 lot = symbol_info.volume_min  # 0.1
@@ -82,6 +84,8 @@ print(f"Using lot size: {lot}")
 # Prepare order
 point = symbol_info.point
 price = tick.ask
+sl_price = price - 200 * point
+tp_price = price + 300 * point
 
 request = {
     "action": mt5.TRADE_ACTION_DEAL,
@@ -89,8 +93,8 @@ request = {
     "volume": lot,
     "type": mt5.ORDER_TYPE_BUY,
     "price": price,
-    "sl": price - 200 * point,
-    "tp": price + 300 * point,
+    "sl": sl_price,
+    "tp": tp_price,
     "deviation": 20,
     "magic": 234000,
     "comment": "Python test",
@@ -120,15 +124,22 @@ if result.retcode == mt5.TRADE_RETCODE_DONE:
     print(f"Price: {result.price:.5f}")
     print("="*60)
     
-    # Wait 3 seconds
-    print("\nWaiting 3 seconds before closing...")
-    time.sleep(3)
+    # Wait (max 3 seconds) until the position shows up, then close it
+    print("\nWaiting for position before closing...")
+    deadline = time.monotonic() + 3.0
+    while True:
+        positions = mt5.positions_get(symbol=symbol)
+        if positions or time.monotonic() >= deadline:
+            break
+        time.sleep(0.05)
     
     # Close position
-    positions = mt5.positions_get(symbol=symbol)
     if positions and len(positions) > 0:
         pos = positions[0]
         
+        # Fresh quote for the close (the opening tick may be stale by now)
+        tick = mt5.symbol_info_tick(symbol) or tick
+        
         print(f"\nClosing position {pos.ticket}...")
         
         close_request = {
@@ -1,28 +1,60 @@
 """
 View Database Contents - Lihat isi database
 """
+import csv
 import sqlite3
-import pandas as pd
 from datetime import datetime
 
 DB_PATH = "data/database/trading_data.db"
 
+def _open(path):
+    """Buka koneksi SQLite dengan WAL + synchronous=NORMAL (reader tidak diblok writer)"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.executescript(
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA cache_size=-65536;"
+    )
+    return conn
+
+def _fmt(value, width, spec=''):
+    """Format satu sel rata kanan; NULL ditampilkan sebagai None"""
+    if value is None:
+        return f"{'None':>{width}}"
+    return f"{value:>{width}{spec}}"
+
 def view_database():
     """View database contents"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _open(DB_PATH)
         
         print("="*80)
         print("📊 DATABASE CONTENTS")
         print("="*80)
         
-        # Get ticks count
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM ticks")
-        ticks_count = cursor.fetchone()[0]
+        # Ringkasan ticks + OHLC per symbol dalam satu query;
+        # total = jumlah count per symbol
+        conn.row_factory = sqlite3.Row
+        cursor = conn.execute("""
+            SELECT 'ticks' AS source, symbol, COUNT(*) AS count,
+                   MIN(timestamp) AS first, MAX(timestamp) AS last
+            FROM ticks
+            GROUP BY symbol
+            UNION ALL
+            SELECT 'ohlc', symbol, COUNT(*), MIN(timestamp), MAX(timestamp)
+            FROM ohlc
+            GROUP BY symbol
+            ORDER BY source DESC, symbol
+        """)
+        
+        summary = {'ticks': [], 'ohlc': []}
+        for source, symbol, count, first, last in cursor:
+            summary[source].append((symbol, count, first, last))
         
-        cursor.execute("SELECT COUNT(*) FROM ohlc")
-        ohlc_count = cursor.fetchone()[0]
+        ticks_count = sum(row[1] for row in summary['ticks'])
+        ohlc_count = sum(row[1] for row in summary['ohlc'])
         
         print(f"\n📈 Total Ticks: {ticks_count:,}")
         print(f"📊 Total OHLC: {ohlc_count:,}")
@@ -32,17 +64,7 @@ def view_database():
         print("TICKS BY SYMBOL:")
         print("-"*80)
         
-        cursor.execute("""
-            SELECT symbol, COUNT(*) as count, 
-                   MIN(timestamp) as first_tick, 
-                   MAX(timestamp) as last_tick
-            FROM ticks 
-            GROUP BY symbol
-            ORDER BY symbol
-        """)
-        
-        for row in cursor.fetchall():
-            symbol, count, first, last = row
+        for symbol, count, first, last in summary['ticks']:
             print(f"{symbol:15} | Count: {count:6,} | First: {first} | Last: {last}")
         
         # Get OHLC by symbol
@@ -50,17 +72,7 @@ def view_database():
         print("OHLC BY SYMBOL:")
         print("-"*80)
         
-        cursor.execute("""
-            SELECT symbol, COUNT(*) as count,
-                   MIN(timestamp) as first_candle,
-                   MAX(timestamp) as last_candle
-            FROM ohlc
-            GROUP BY symbol
-            ORDER BY symbol
-        """)
-        
-        for row in cursor.fetchall():
-            symbol, count, first, last = row
+        for symbol, count, first, last in summary['ohlc']:
             print(f"{symbol:15} | Count: {count:6,} | First: {first} | Last: {last}")
         
         # Show recent ticks
@@ -68,16 +80,21 @@ def view_database():
         print("RECENT TICKS (Last 10):")
         print("-"*80)
         
-        df_ticks = pd.read_sql_query("""
+        cursor = conn.execute("""
             SELECT timestamp, symbol, bid, ask, spread, volume
             FROM ticks
             ORDER BY timestamp DESC
             LIMIT 10
-        """, conn)
+        """)
         
-        if not df_ticks.empty:
-            print(df_ticks.to_string(index=False))
-        else:
+        empty = True
+        for r in cursor:
+            if empty:
+                print(f"{'timestamp':>19} {'symbol':>10} {'bid':>10} {'ask':>10} {'spread':>7} {'volume':>8}")
+                empty = False
+            print(f"{_fmt(r['timestamp'], 19)} {_fmt(r['symbol'], 10)} {_fmt(r['bid'], 10, '.5f')} "
+                  f"{_fmt(r['ask'], 10, '.5f')} {_fmt(r['spread'], 7, '.1f')} {_fmt(r['volume'], 8)}")
+        if empty:
             print("No ticks data")
         
         # Show recent OHLC
@@ -85,16 +102,22 @@ def view_database():
         print("RECENT OHLC (Last 10):")
         print("-"*80)
         
-        df_ohlc = pd.read_sql_query("""
+        cursor = conn.execute("""
             SELECT timestamp, symbol, open, high, low, close, volume
             FROM ohlc
             ORDER BY timestamp DESC
             LIMIT 10
-        """, conn)
+        """)
         
-        if not df_ohlc.empty:
-            print(df_ohlc.to_string(index=False))
-        else:
+        empty = True
+        for r in cursor:
+            if empty:
+                print(f"{'timestamp':>19} {'symbol':>10} {'open':>10} {'high':>10} {'low':>10} {'close':>10} {'volume':>8}")
+                empty = False
+            print(f"{_fmt(r['timestamp'], 19)} {_fmt(r['symbol'], 10)} {_fmt(r['open'], 10, '.5f')} "
+                  f"{_fmt(r['high'], 10, '.5f')} {_fmt(r['low'], 10, '.5f')} "
+                  f"{_fmt(r['close'], 10, '.5f')} {_fmt(r['volume'], 8)}")
+        if empty:
             print("No OHLC data")
         
         conn.close()
@@ -104,23 +127,33 @@ def view_database():
     except Exception as e:
         print(f"❌ Error: {str(e)}")
 
+def _export_table(conn, sql, filename):
+    """Stream hasil query langsung ke CSV (tanpa DataFrame); False kalau kosong"""
+    cursor = conn.execute(sql)
+    first = cursor.fetchone()
+    if first is None:
+        return False
+    
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow([col[0] for col in cursor.description])
+        writer.writerow(first)
+        writer.writerows(cursor)
+    return True
+
 def export_to_csv():
     """Export database to CSV"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _open(DB_PATH)
         
         # Export ticks
-        df_ticks = pd.read_sql_query("SELECT * FROM ticks ORDER BY timestamp DESC", conn)
-        if not df_ticks.empty:
-            filename = f"database_ticks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            df_ticks.to_csv(filename, index=False)
+        filename = f"database_ticks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        if _export_table(conn, "SELECT * FROM ticks ORDER BY timestamp DESC", filename):
             print(f"✅ Ticks exported: {filename}")
         
         # Export OHLC
-        df_ohlc = pd.read_sql_query("SELECT * FROM ohlc ORDER BY timestamp DESC", conn)
-        if not df_ohlc.empty:
-            filename = f"database_ohlc_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            df_ohlc.to_csv(filename, index=False)
+        filename = f"database_ohlc_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        if _export_table(conn, "SELECT * FROM ohlc ORDER BY timestamp DESC", filename):
             print(f"✅ OHLC exported: {filename}")
         
         conn.close()